@@ -1,19 +1,44 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, Request, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, ConfigDict, Field
 import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES
 import google.generativeai as genai
 from dotenv import load_dotenv
 import os
+import re
 import json
-from typing import List, Optional
+import orjson
+import asyncio
+import atexit
+import hashlib
+import functools
+import itertools
+import shutil
+import tempfile
+from typing import Dict, List, NamedTuple, Optional, Type, Union
+from cachetools import TTLCache
 import rdkit
 from rdkit import Chem
-from rdkit.Chem import AllChem
+from rdkit.Chem import rdMolDescriptors
 import logging
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging. Request handlers only enqueue records; a background
+# listener thread writes them to stderr.
+log_queue = Queue(-1)
+queue_handler = QueueHandler(log_queue)
+queue_handler.setFormatter(logging.Formatter("%(message)s"))
+stream_handler = logging.StreamHandler()
+stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+log_listener = QueueListener(log_queue, stream_handler)
+logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+log_listener.start()
+# Flush queued records on exit, including when startup fails below
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
@@ -26,44 +51,288 @@ try:
         logger.error("GEMINI_API_KEY not found in environment variables")
         raise ValueError("GEMINI_API_KEY not found in environment variables")
     
-    # Configure the API
-    genai.configure(api_key=api_key)
+    # Configure the API. All Gemini calls are async, and the async client is
+    # shared, so every request multiplexes over one gRPC HTTP/2 channel.
+    genai.configure(api_key=api_key, transport="grpc_asyncio")
     
-    # Test the API configuration
-    try:
-        # List available models
-        available_models = genai.list_models()
-        logger.info(f"Available models: {[model.name for model in available_models]}")
-        
-        # Use the latest Gemini Pro model
-        model = genai.GenerativeModel('gemini-1.5-pro-latest')
-        
-        # Test the model with a simple prompt
-        test_response = model.generate_content("Test")
-        if not test_response or not test_response.text:
-            raise ValueError("Failed to get response from Gemini API")
-        logger.info("Successfully configured and tested Gemini API")
-    except Exception as e:
-        logger.error(f"Failed to initialize Gemini API: {str(e)}")
-        raise ValueError(f"Failed to initialize Gemini API: {str(e)}")
+    # Use the latest Gemini Pro model
+    model = genai.GenerativeModel('gemini-1.5-pro-latest')
 except Exception as e:
-    logger.error(f"Error configuring Gemini API: {str(e)}")
+    logger.error("Error configuring Gemini API: %s", e)
     raise
 
-app = FastAPI(title="Drug Discovery API")
+# Cache Gemini responses by prompt so repeated requests skip the API round trip
+_gemini_cache = TTLCache(maxsize=1024, ttl=600)
+_gemini_inflight: Dict[str, asyncio.Task] = {}
+
+# Characters that can appear in a SMILES string, used to reject obviously
+# invalid input before handing it to RDKit
+SMILES_RE = re.compile(r"[A-Za-z0-9@+\-\[\]\(\)=#$:/\\.%*]{1,500}")
+
+# Rows serialized per chunk when streaming uploaded CSVs back
+CSV_CHUNK_SIZE = 10000
+
+# Parse CSVs with pyarrow's multi-threaded reader when it is installed,
+# otherwise with pandas' C engine
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+# Upload limits for /upload-csv
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 50 * 1024 * 1024))
+MAX_CSV_ROWS = int(os.getenv("MAX_CSV_ROWS", 1000000))
+
+async def generate_uncached(prompt: str, response_schema: Optional[Type[BaseModel]], key: str) -> Union[str, BaseModel]:
+    generation_config = None
+    if response_schema:
+        generation_config = {
+            "response_mime_type": "application/json",
+            "response_schema": response_schema
+        }
+    response = await model.generate_content_async(prompt, generation_config=generation_config)
+    if not response or not response.text:
+        raise Exception("Empty response from Gemini API")
+    # Validate before caching so a malformed or truncated reply isn't
+    # served to every retry until the cache entry expires
+    result = response_schema.model_validate_json(response.text) if response_schema else response.text
+    _gemini_cache[key] = result
+    return result
+
+async def cached_generate(prompt: str, response_schema: Optional[Type[BaseModel]] = None) -> Union[str, BaseModel]:
+    """Generate a reply for prompt.
+
+    With a response_schema, Gemini is constrained to matching JSON and the
+    reply is returned as a validated schema instance instead of text.
+    """
+    schema_name = response_schema.__name__ if response_schema else ""
+    key = hashlib.sha256((schema_name + prompt).encode()).hexdigest()
+    if key in _gemini_cache:
+        return _gemini_cache[key]
+
+    # Concurrent requests for the same prompt share one API call. It runs in
+    # its own task and every caller awaits it through shield(), so a
+    # cancelled caller (including the first) doesn't cancel it for the others.
+    task = _gemini_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(generate_uncached(prompt, response_schema, key))
+        _gemini_inflight[key] = task
+
+        def forget(done: asyncio.Future):
+            _gemini_inflight.pop(key, None)
+            # Mark a failure as retrieved in case every caller went away
+            if not done.cancelled():
+                done.exception()
+
+        task.add_done_callback(forget)
+    return await asyncio.shield(task)
+
+class MolFeatures(NamedTuple):
+    molecular_weight: float
+    canonical_smiles: str
+
+@functools.lru_cache(maxsize=2048)
+def rdkit_features(smiles: str) -> Optional[MolFeatures]:
+    """Parse smiles once and return its cached features, or None if it is invalid."""
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return None
+
+    # Only descriptors are returned, so no 3D embedding is needed
+    try:
+        mol_weight = rdMolDescriptors.CalcExactMolWt(mol)
+    except Exception as e:
+        logger.warning("Could not calculate molecular weight: %s", e)
+        mol_weight = 0.0
+
+    return MolFeatures(mol_weight, Chem.MolToSmiles(mol))
+
+def dedup_column_names(names: List[str]) -> List[str]:
+    """Rename repeated column names to name.1, name.2, ... skipping names
+    already in the header, as pandas' C parser does."""
+    counts: Dict[str, int] = {}
+    result = []
+    for name in names:
+        count = counts.get(name, 0)
+        if count > 0:
+            original = name
+            while count > 0:
+                counts[original] = count + 1
+                name = f"{original}.{count}"
+                count = count + 1 if name in names else counts.get(name, 0)
+        counts[name] = count + 1
+        result.append(name)
+    return result
+
+def read_csv_pyarrow(path: str) -> pd.DataFrame:
+    """Parse a whole CSV file with pyarrow, giving the same values as pandas' C engine.
+
+    Unlike the C engine, rows with fewer fields than the header are a parse
+    error rather than padded with nulls.
+    """
+    convert_options = pa_csv.ConvertOptions(
+        null_values=list(STR_NA_VALUES),
+        strings_can_be_null=True,
+        true_values=["True", "TRUE", "true"],
+        false_values=["False", "FALSE", "false"],
+    )
+    try:
+        table = pa_csv.read_csv(path, convert_options=convert_options)
+        # pyarrow infers dates and timestamps where pandas keeps the original
+        # text, so read any such columns again as plain strings
+        temporal = {field.name: pa.string() for field in table.schema if pa.types.is_temporal(field.type)}
+        if temporal:
+            convert_options.column_types = temporal
+            table = pa_csv.read_csv(path, convert_options=convert_options)
+    except pa.ArrowInvalid as e:
+        raise pd.errors.ParserError(str(e)) from e
+    return table.rename_columns(dedup_column_names(table.column_names)).to_pandas()
+
+def iter_csv_chunks(path: str):
+    """Yield DataFrames of at most CSV_CHUNK_SIZE rows parsed from a CSV file."""
+    if os.path.getsize(path) == 0:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+
+    if CSV_ENGINE == "pyarrow":
+        # Parse the whole (size-limited) upload in one go, so type errors
+        # anywhere in the file surface before the response starts
+        df = read_csv_pyarrow(path)
+        if len(df) > MAX_CSV_ROWS:
+            # Hand back one row past the limit so the file is rejected up front
+            yield df.iloc[:MAX_CSV_ROWS + 1]
+            return
+        for start in range(0, max(len(df), 1), CSV_CHUNK_SIZE):
+            yield df.iloc[start:start + CSV_CHUNK_SIZE]
+    else:
+        # Read one row past the limit so oversized files can be told apart
+        yield from pd.read_csv(path, chunksize=CSV_CHUNK_SIZE, nrows=MAX_CSV_ROWS + 1)
+
+def spool_upload(file) -> str:
+    """Copy an uploaded file to a temporary path that outlives the request handler."""
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as tmp:
+        shutil.copyfileobj(file, tmp)
+    return tmp.name
+
+def remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def csv_json_body(path: str, first_chunk, chunks):
+    """Yield the /upload-csv JSON response, serializing one parsed chunk at a time."""
+    row_count = 0
+    columns = first_chunk.columns.tolist()
+    separator = ""
+    try:
+        yield '{"message":"File uploaded successfully","data":['
+        for chunk in itertools.chain([first_chunk], chunks):
+            row_count += len(chunk)
+            if row_count > MAX_CSV_ROWS:
+                # The status line is already sent, so abort the response
+                # rather than return a silently truncated file
+                raise ValueError(f"CSV file has more than {MAX_CSV_ROWS} rows")
+
+            # to_json writes missing values (NaN, NaT, NA) as null, so no separate
+            # replacement pass is needed. Strip the surrounding brackets so chunks
+            # can be joined into one array.
+            json_data = chunk.to_json(orient='records', date_format='iso', double_precision=10)[1:-1]
+            if json_data:
+                yield separator + json_data
+                separator = ","
+        yield f'],"row_count":{row_count},"columns":{orjson.dumps(columns).decode()}}}'
+        logger.info("Successfully read CSV file with %s rows", row_count)
+    except Exception as e:
+        logger.error("Error streaming CSV file: %s", e)
+        raise
+    finally:
+        chunks.close()
+        remove_file(path)
+
+app = FastAPI(title="Drug Discovery API", default_response_class=ORJSONResponse)
+
+class UploadTooLarge(HTTPException):
+    """Raised while receiving an /upload-csv body larger than MAX_UPLOAD_BYTES."""
 
-# Configure CORS
+    def __init__(self):
+        super().__init__(status_code=413, detail="File too large")
+
+class UploadSizeLimitMiddleware:
+    """Reject /upload-csv requests larger than MAX_UPLOAD_BYTES before FastAPI
+    buffers the multipart body. Requests with a Content-Length header are
+    rejected up front; otherwise the body is counted as it arrives. Other
+    routes pass straight through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != "/upload-csv":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"0")
+        if content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+            logger.error("Rejected upload of %s bytes", content_length.decode())
+            response = ORJSONResponse(status_code=413, content={"detail": "File too large"})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+@app.exception_handler(UploadTooLarge)
+async def upload_too_large_handler(request: Request, exc: UploadTooLarge):
+    logger.error("Rejected upload of more than %s bytes", MAX_UPLOAD_BYTES)
+    return ORJSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+# Added before CORS so that 413 responses still carry CORS headers
+app.add_middleware(UploadSizeLimitMiddleware)
+
+# Configure CORS. Browsers may cache preflight responses for a day.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=[
+        origin.strip()
+        for origin in os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
+        if origin.strip()
+    ],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
 )
 
+async def check_gemini():
+    try:
+        await model.generate_content_async("ping", generation_config={"max_output_tokens": 1})
+        logger.info("Successfully configured and tested Gemini API")
+    except Exception as e:
+        logger.warning("Gemini health check failed: %s", e)
+
+@app.on_event("startup")
+async def start_gemini_check():
+    # Probe the API in the background rather than at import time, so workers
+    # start serving immediately and failures only log a warning
+    app.state.gemini_check = asyncio.create_task(check_gemini())
+
 class DrugAnalysis(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     molecular_formula: str
-    structure: str
+    structure: str = Field(max_length=500)
     properties: dict
 
 class DiseaseAnalysis(BaseModel):
@@ -75,80 +344,155 @@ class ProteinSuggestion(BaseModel):
     disease_name: str
     drug_class: Optional[str] = None
 
+# Response schemas Gemini is constrained to when replying with JSON
+class DrugCandidate(BaseModel):
+    name: str
+    smiles: str
+    molecular_formula: str
+    mechanism: str
+    side_effects: str
+    drug_likeness: str
+
+class DrugCandidates(BaseModel):
+    candidates: List[DrugCandidate]
+
+class Protein(BaseModel):
+    name: str
+    uniprot_id: str
+    role: str
+    target_potential: str
+
+class ProteinSuggestions(BaseModel):
+    proteins: List[Protein]
+
+# Prompt templates. The static instructions come first and stay byte-identical
+# across requests so Gemini can reuse the cached prefix; only the request
+# details at the end are interpolated.
+ANALYZE_TMPL = """Analyze the drug molecule described below.
+
+Please provide:
+1. Molecular weight
+2. Potential drug-likeness
+3. Possible side effects
+4. Drug existence prediction
+
+Molecular Formula: {formula}
+Structure: {structure}
+Properties: {props}
+"""
+
+DISCOVER_TMPL = """Suggest potential drug candidates for the disease described below.
+
+Please provide:
+1. List of potential drug candidates with their SMILES structures
+2. Molecular formulas
+3. Target mechanisms
+4. Potential side effects
+5. Drug-likeness scores
+
+Disease: {disease}
+Target Proteins: {proteins}
+Preferred Drug Class: {drug_class}
+"""
+
+SUGGEST_TMPL = """For the disease (and drug class, if given) described below, suggest relevant target proteins that could be used for drug development.
+
+Please provide:
+1. A list of protein names and their UniProt IDs
+2. Brief description of their role in the disease
+3. Their potential as drug targets (high/medium/low)
+
+Disease: {disease}
+Drug Class: {drug_class}
+"""
+
 @app.post("/upload-csv")
 async def upload_csv(file: UploadFile = File(...)):
     try:
-        # Read CSV file
-        df = pd.read_csv(file.file)
-        logger.info(f"Successfully read CSV file with {len(df)} rows")
-        
-        # Replace NaN values with None for JSON serialization
-        df = df.replace({pd.NA: None, pd.NaT: None})
-        df = df.where(pd.notnull(df), None)
-        
-        # Convert DataFrame to JSON using pandas' built-in method
-        json_data = df.to_json(orient='records', date_format='iso', double_precision=10)
-        data = json.loads(json_data)
-        
-        return {
-            "message": "File uploaded successfully",
-            "data": data,
-            "row_count": len(df),
-            "columns": df.columns.tolist()
-        }
+        # Backstop for the middleware, which should already have stopped
+        # oversized uploads while they were being received
+        if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+            logger.error("Rejected upload of %s bytes", file.size)
+            raise HTTPException(status_code=413, detail="File too large")
+
+        # The upload is closed once this handler returns, so copy it to a
+        # temporary file that the streamed response keeps reading from
+        path = await asyncio.to_thread(spool_upload, file.file)
+        chunks = iter_csv_chunks(path)
+        try:
+            # Parse the header and first chunk up front so malformed files
+            # still get a 400 before the response starts
+            first_chunk = await asyncio.to_thread(next, chunks, None)
+            if first_chunk is None:
+                raise pd.errors.EmptyDataError("No columns to parse from file")
+            if len(first_chunk) > MAX_CSV_ROWS:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"CSV file has more than {MAX_CSV_ROWS} rows"
+                )
+        except BaseException:
+            chunks.close()
+            remove_file(path)
+            raise
+
+        return StreamingResponse(
+            csv_json_body(path, first_chunk, chunks),
+            media_type="application/json",
+            # Also clean up if the client disconnects before the body is read
+            background=BackgroundTask(remove_file, path)
+        )
+    except HTTPException:
+        raise
     except pd.errors.EmptyDataError:
         logger.error("The uploaded file is empty")
         raise HTTPException(status_code=400, detail="The uploaded file is empty")
     except pd.errors.ParserError as e:
-        logger.error(f"Error parsing CSV file: {str(e)}")
+        logger.error("Error parsing CSV file: %s", e)
         raise HTTPException(status_code=400, detail=f"Error parsing CSV file: {str(e)}")
     except Exception as e:
-        logger.error(f"Error processing CSV file: {str(e)}")
+        logger.error("Error processing CSV file: %s", e)
         raise HTTPException(status_code=400, detail=f"Error processing CSV file: {str(e)}")
 
 @app.post("/analyze-molecule")
 async def analyze_molecule(drug: DrugAnalysis):
     try:
-        logger.info(f"Analyzing molecule with formula: {drug.molecular_formula}")
+        logger.info("Analyzing molecule with formula: %s", drug.molecular_formula)
         
         # Validate SMILES string
         if not drug.structure:
             raise HTTPException(status_code=400, detail="SMILES structure is required")
+        if not SMILES_RE.fullmatch(drug.structure):
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid SMILES structure. Please check the format and try again."
+            )
             
-        # Create RDKit molecule from SMILES
-        mol = Chem.MolFromSmiles(drug.structure)
-        if mol is None:
+        # Parse the SMILES and compute its RDKit features (cached per SMILES)
+        features = await asyncio.to_thread(rdkit_features, drug.structure)
+        if features is None:
             raise HTTPException(
                 status_code=400, 
                 detail="Invalid SMILES structure. Please check the format and try again."
             )
-
-        # Generate 3D coordinates
-        try:
-            AllChem.EmbedMolecule(mol, randomSeed=42)
-        except Exception as e:
-            logger.warning(f"Could not generate 3D coordinates: {str(e)}")
-            # Continue without 3D coordinates
         
         # Prepare prompt for Gemini
-        prompt = f"""
-        Analyze this drug molecule:
-        Molecular Formula: {drug.molecular_formula}
-        Structure: {drug.structure}
-        Properties: {json.dumps(drug.properties)}
-        
-        Please provide:
-        1. Molecular weight
-        2. Potential drug-likeness
-        3. Possible side effects
-        4. Drug existence prediction
-        """
+        # Sorted keys keep the prompt (and its cache key) independent of dict
+        # order; orjson's compact output sends fewer tokens to Gemini
+        try:
+            props_json = orjson.dumps(drug.properties, option=orjson.OPT_SORT_KEYS).decode()
+        except orjson.JSONEncodeError:
+            # orjson rejects integers outside the 64-bit range; the stdlib
+            # encoder doesn't, and these options give the same output format
+            props_json = json.dumps(drug.properties, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        prompt = ANALYZE_TMPL.format(
+            formula=drug.molecular_formula,
+            structure=drug.structure,
+            props=props_json
+        )
 
         # Get response from Gemini
         try:
-            response = model.generate_content(prompt)
-            if not response or not response.text:
-                raise Exception("Empty response from Gemini API")
+            text = await cached_generate(prompt)
         except Exception as e:
             error_message = str(e)
             if "API key not valid" in error_message:
@@ -157,28 +501,21 @@ async def analyze_molecule(drug: DrugAnalysis):
                     status_code=500,
                     detail="Invalid API key. Please check your GEMINI_API_KEY environment variable."
                 )
-            logger.error(f"Error getting response from Gemini API: {error_message}")
+            logger.error("Error getting response from Gemini API: %s", error_message)
             raise HTTPException(
                 status_code=500,
                 detail="Error analyzing molecule with AI. Please try again later."
             )
         
-        # Calculate molecular weight
-        try:
-            mol_weight = Chem.rdMolDescriptors.CalcExactMolWt(mol)
-        except Exception as e:
-            logger.warning(f"Could not calculate molecular weight: {str(e)}")
-            mol_weight = 0.0
-        
         return {
-            "analysis": response.text,
-            "molecular_weight": mol_weight,
-            "smiles": Chem.MolToSmiles(mol)
+            "analysis": text,
+            "molecular_weight": features.molecular_weight,
+            "smiles": features.canonical_smiles
         }
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in analyze_molecule: {str(e)}")
+        logger.error("Unexpected error in analyze_molecule: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"An unexpected error occurred: {str(e)}"
@@ -187,44 +524,20 @@ async def analyze_molecule(drug: DrugAnalysis):
 @app.post("/discover-drugs")
 async def discover_drugs(disease: DiseaseAnalysis):
     try:
-        logger.info(f"Discovering drugs for disease: {disease.disease_name}")
+        logger.info("Discovering drugs for disease: %s", disease.disease_name)
         
         # Prepare prompt for Gemini
-        prompt = f"""
-        Analyze potential drug candidates for {disease.disease_name}.
-        Target Proteins: {', '.join(disease.target_proteins) if disease.target_proteins else 'Not specified'}
-        Preferred Drug Class: {disease.drug_class if disease.drug_class else 'Not specified'}
-        
-        Please provide:
-        1. List of potential drug candidates with their SMILES structures
-        2. Molecular formulas
-        3. Target mechanisms
-        4. Potential side effects
-        5. Drug-likeness scores
-        Format the response as a JSON object with these fields.
-        """
+        prompt = DISCOVER_TMPL.format(
+            disease=disease.disease_name,
+            proteins=', '.join(disease.target_proteins) if disease.target_proteins else 'Not specified',
+            drug_class=disease.drug_class if disease.drug_class else 'Not specified'
+        )
 
-        # Get response from Gemini
+        # Get response from Gemini. The schema carries every candidate field,
+        # so one call returns the details already attached to each candidate.
         try:
-            response = model.generate_content(prompt)
-            if not response or not response.text:
-                raise Exception("Empty response from Gemini API")
-            
-            # Parse the response as JSON
-            try:
-                drug_candidates = json.loads(response.text)
-            except json.JSONDecodeError:
-                # If response is not JSON, format it as a structured response
-                drug_candidates = {
-                    "candidates": [{
-                        "name": "Sample Drug",
-                        "smiles": "CC(=O)O",
-                        "molecular_formula": "C2H4O2",
-                        "mechanism": response.text,
-                        "side_effects": "Not specified",
-                        "drug_likeness": "Not specified"
-                    }]
-                }
+            candidates = await cached_generate(prompt, DrugCandidates)
+            drug_candidates = candidates.model_dump()
             
             return {
                 "disease": disease.disease_name,
@@ -238,7 +551,7 @@ async def discover_drugs(disease: DiseaseAnalysis):
                     status_code=500,
                     detail="Invalid API key. Please check your GEMINI_API_KEY environment variable."
                 )
-            logger.error(f"Error getting response from Gemini API: {error_message}")
+            logger.error("Error getting response from Gemini API: %s", error_message)
             raise HTTPException(
                 status_code=500,
                 detail="Error discovering drugs with AI. Please try again later."
@@ -246,7 +559,7 @@ async def discover_drugs(disease: DiseaseAnalysis):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in discover_drugs: {str(e)}")
+        logger.error("Unexpected error in discover_drugs: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"An unexpected error occurred: {str(e)}"
@@ -255,52 +568,18 @@ async def discover_drugs(disease: DiseaseAnalysis):
 @app.post("/suggest-proteins")
 async def suggest_proteins(suggestion: ProteinSuggestion):
     try:
-        logger.info(f"Suggesting proteins for disease: {suggestion.disease_name}")
+        logger.info("Suggesting proteins for disease: %s", suggestion.disease_name)
         
         # Prepare prompt for Gemini
-        prompt = f"""
-        For the disease '{suggestion.disease_name}'{" and drug class '" + suggestion.drug_class + "'" if suggestion.drug_class else ""}, 
-        suggest relevant target proteins that could be used for drug development.
-        
-        Please provide:
-        1. A list of protein names and their UniProt IDs
-        2. Brief description of their role in the disease
-        3. Their potential as drug targets
-        
-        Format the response as a JSON object with these fields:
-        {{
-            "proteins": [
-                {{
-                    "name": "protein name",
-                    "uniprot_id": "UniProt ID",
-                    "role": "role in disease",
-                    "target_potential": "high/medium/low"
-                }}
-            ]
-        }}
-        """
+        prompt = SUGGEST_TMPL.format(
+            disease=suggestion.disease_name,
+            drug_class=suggestion.drug_class if suggestion.drug_class else 'Not specified'
+        )
 
         # Get response from Gemini
         try:
-            response = model.generate_content(prompt)
-            if not response or not response.text:
-                raise Exception("Empty response from Gemini API")
-            
-            # Parse the response as JSON
-            try:
-                protein_suggestions = json.loads(response.text)
-            except json.JSONDecodeError:
-                # If response is not JSON, format it as a structured response
-                protein_suggestions = {
-                    "proteins": [{
-                        "name": "Sample Protein",
-                        "uniprot_id": "P12345",
-                        "role": response.text,
-                        "target_potential": "medium"
-                    }]
-                }
-            
-            return protein_suggestions
+            protein_suggestions = await cached_generate(prompt, ProteinSuggestions)
+            return protein_suggestions.model_dump()
         except Exception as e:
             error_message = str(e)
             if "API key not valid" in error_message:
@@ -309,7 +588,7 @@ async def suggest_proteins(suggestion: ProteinSuggestion):
                     status_code=500,
                     detail="Invalid API key. Please check your GEMINI_API_KEY environment variable."
                 )
-            logger.error(f"Error getting response from Gemini API: {error_message}")
+            logger.error("Error getting response from Gemini API: %s", error_message)
             raise HTTPException(
                 status_code=500,
                 detail="Error getting protein suggestions. Please try again later."
@@ -317,7 +596,7 @@ async def suggest_proteins(suggestion: ProteinSuggestion):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in suggest_proteins: {str(e)}")
+        logger.error("Unexpected error in suggest_proteins: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"An unexpected error occurred: {str(e)}"
@@ -329,4 +608,11 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=os.getenv("HOST", "127.0.0.1"), port=int(os.getenv("PORT", 8000))) 
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "127.0.0.1"),
+        port=int(os.getenv("PORT", 8000)),
+        workers=int(os.getenv("WORKERS", os.cpu_count() or 2)),
+        limit_concurrency=int(os.getenv("MAX_CONCURRENCY", 200)),
+        timeout_keep_alive=5
+    ) 
\ No newline at end of file